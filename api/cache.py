@@ -0,0 +1,65 @@
+"""In-process cache for generated answers."""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+
+
+class AnswerCache:
+    """LRU cache with expiry for answers keyed by query and retrieved chunks."""
+    
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 3600.0):
+        """
+        Initialize answer cache.
+        
+        Args:
+            max_size: Maximum number of answers to keep (default: 1024)
+            ttl_seconds: How long an answer stays valid (default: 1 hour)
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(query: str, chunks: List[Dict[str, Any]]) -> str:
+        """
+        Build a cache key from the normalized query and the retrieved chunks.
+        
+        Args:
+            query: User query
+            chunks: Retrieved context chunks the answer is generated from
+            
+        Returns:
+            Hex digest identifying the (query, context) pair
+        """
+        chunk_ids = sorted(
+            str(chunk['id']) if chunk.get('id') is not None
+            else f"{chunk.get('metadata', {}).get('file_path', '')}#{chunk.get('metadata', {}).get('chunk_index', '')}"
+            for chunk in chunks
+        )
+        raw = query.lower().strip() + "|" + ",".join(chunk_ids)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached answer for a key, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, answer = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return answer
+    
+    def set(self, key: str, answer: str):
+        """Store an answer, evicting the least recently used one if full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, answer)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
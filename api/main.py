@@ -1,14 +1,17 @@
 """FastAPI application for RAG system."""
 
-from typing import Dict, Any
+import json
+from typing import Dict, Any, List, Iterator
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 
 from storage import VectorStore
-from embedding import Embedder
-from retrieval import Retriever, QueryRewriter
+from embedding import Embedder, EmbeddingBatcher, get_embedder
+from retrieval import Retriever, QueryExpander
 from llm import LLMClient
 from api.models import QueryRequest, QueryResponse
+from api.cache import AnswerCache
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -29,14 +32,16 @@ app.add_middleware(
 # Global variables to store initialized components
 vector_store: VectorStore = None
 embedder: Embedder = None
+embedding_batcher: EmbeddingBatcher = None
 llm_client: LLMClient = None
 retriever: Retriever = None
+answer_cache = AnswerCache()
 
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize RAG components when server starts."""
-    global vector_store, embedder, llm_client, retriever
+    global vector_store, embedder, embedding_batcher, llm_client, retriever
     
     print("Initializing RAG components...")
     
@@ -49,7 +54,8 @@ async def startup_event():
         
         # Initialize embedder
         print("Loading embedding model...")
-        embedder = Embedder(model_name="all-MiniLM-L6-v2")
+        embedder = get_embedder("all-MiniLM-L6-v2", backend="onnx")
+        embedding_batcher = EmbeddingBatcher(embedder)
         
         # Initialize LLM client
         print("Initializing LLM client...")
@@ -61,14 +67,15 @@ async def startup_event():
             print("LLM features will not be available")
             llm_client = None
         
-        # Initialize query rewriter and retriever
-        if llm_client:
-            print("Setting up query rephrasing...")
-            query_rewriter = QueryRewriter(llm_client)
-            retriever = Retriever(vector_store, embedder, query_rewriter=query_rewriter)
-        else:
-            print("Setting up retriever (without query rephrasing)...")
-            retriever = Retriever(vector_store, embedder)
+        # Initialize retriever with embedding-space query expansion
+        # (avoids an LLM rephrasing call on every query)
+        print("Setting up retriever with query expansion...")
+        retriever = Retriever(
+            vector_store,
+            embedder,
+            embedding_batcher=embedding_batcher,
+            query_expander=QueryExpander()
+        )
         
         print("[OK] All components initialized successfully!")
         
@@ -77,6 +84,13 @@ async def startup_event():
         raise
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background tasks when server shuts down."""
+    if embedding_batcher:
+        await embedding_batcher.stop()
+
+
 @app.get("/", tags=["General"])
 async def root():
     """Root endpoint with API information."""
@@ -87,6 +101,34 @@ async def root():
     }
 
 
+async def _retrieve_chunks(request: QueryRequest) -> List[Dict[str, Any]]:
+    """Retrieve chunks for a query request, raising 404 if nothing is found."""
+    if request.num_variations > 0 and (retriever.query_rewriter or retriever.query_expander):
+        # Use query variations
+        retrieved_chunks = await retriever.retrieve_with_rephrasing_async(
+            query=request.query,
+            k=request.k,
+            min_score=request.min_score,
+            num_variations=request.num_variations,
+            k_per_query=request.k
+        )
+    else:
+        # Use basic retrieval
+        retrieved_chunks = await retriever.retrieve_async(
+            query=request.query,
+            k=request.k,
+            min_score=request.min_score
+        )
+    
+    if not retrieved_chunks:
+        raise HTTPException(
+            status_code=404,
+            detail="No relevant chunks found for the query"
+        )
+    
+    return retrieved_chunks
+
+
 @app.post("/query", response_model=QueryResponse, tags=["Query"])
 async def query_rag(request: QueryRequest):
     """
@@ -107,37 +149,22 @@ async def query_rag(request: QueryRequest):
     
     try:
         # Step 1: Retrieve relevant chunks
-        if request.num_variations > 0 and retriever.query_rewriter:
-            # Use query rephrasing
-            retrieved_chunks = retriever.retrieve_with_rephrasing(
-                query=request.query,
-                k=request.k,
-                min_score=request.min_score,
-                num_variations=request.num_variations,
-                k_per_query=request.k
-            )
-        else:
-            # Use basic retrieval
-            retrieved_chunks = retriever.retrieve(
-                query=request.query,
-                k=request.k,
-                min_score=request.min_score
-            )
+        retrieved_chunks = await _retrieve_chunks(request)
         
-        if not retrieved_chunks:
-            raise HTTPException(
-                status_code=404,
-                detail="No relevant chunks found for the query"
-            )
+        # Step 2: Reuse a cached answer for the same query and context
+        cache_key = AnswerCache.make_key(request.query, retrieved_chunks)
+        answer = answer_cache.get(cache_key)
         
-        # Step 2: Generate answer using LLM
-        answer = llm_client.generate_with_context(
-            query=request.query,
-            context_chunks=retrieved_chunks,
-            max_context_chunks=request.k
-        )
+        # Step 3: Generate answer using LLM
+        if answer is None:
+            answer = await llm_client.generate_with_context_async(
+                query=request.query,
+                context_chunks=retrieved_chunks,
+                max_context_chunks=request.k
+            )
+            answer_cache.set(cache_key, answer)
         
-        # Step 3: Return only the answer
+        # Step 4: Return only the answer
         return QueryResponse(answer=answer)
         
     except HTTPException:
@@ -148,3 +175,43 @@ async def query_rag(request: QueryRequest):
             detail=f"Error processing query: {str(e)}"
         )
 
+
+@app.post("/query/stream", tags=["Query"])
+async def query_rag_stream(request: QueryRequest):
+    """
+    Query the RAG system and stream the answer as Server-Sent Events.
+    
+    Accepts the same body as `/query`. Each event carries a JSON-encoded
+    piece of the answer; the stream ends with a `[DONE]` event.
+    """
+    global retriever, llm_client
+    
+    if not retriever:
+        raise HTTPException(status_code=503, detail="RAG system not initialized")
+    
+    if not llm_client:
+        raise HTTPException(status_code=503, detail="LLM client not available")
+    
+    try:
+        retrieved_chunks = await _retrieve_chunks(request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error processing query: {str(e)}"
+        )
+    
+    def event_stream() -> Iterator[str]:
+        try:
+            for token in llm_client.generate_with_context_stream(
+                query=request.query,
+                context_chunks=retrieved_chunks,
+                max_context_chunks=request.k
+            ):
+                yield f"data: {json.dumps(token)}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps(str(e))}\n\n"
+        yield "data: [DONE]\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
@@ -1,7 +1,16 @@
 """Text splitting with overlap for RAG system."""
 
-from typing import List, Dict, Any
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+import re
+from collections import deque
+from typing import List, Dict, Any, Iterator
+
+
+# Sentence-like pieces: text up to terminal punctuation followed by whitespace,
+# or up to a line break, together with the trailing whitespace
+_SENTENCE_RE = re.compile(r".+?(?:[.!?]+(?=\s)|\n|$)\s*", re.DOTALL)
+
+# Words with their trailing whitespace, used for sentences longer than a chunk
+_WORD_RE = re.compile(r"\S+\s*|\s+")
 
 
 class TextSplitter:
@@ -19,35 +28,95 @@ class TextSplitter:
             chunk_size: Maximum size of each chunk in characters (default: 1000)
             chunk_overlap: Number of characters to overlap between chunks (default: 200)
         """
-        self.splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            separators=["\n\n", "\n", ". ", " ", ""],  # Try paragraphs, then sentences, then words
-            length_function=len
-        )
+        if chunk_overlap >= chunk_size:
+            raise ValueError(
+                f"chunk_overlap ({chunk_overlap}) must be smaller than chunk_size ({chunk_size})"
+            )
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
     
-    def split_document(self, document: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def split_text(self, text: str) -> List[str]:
+        """
+        Split text into chunks in a single pass.
+        
+        Sentences are packed into a chunk until the next one would exceed
+        chunk_size; the next chunk then starts with the trailing sentences
+        that fit within chunk_overlap.
+        
+        Args:
+            text: Text to split
+            
+        Returns:
+            List of chunk strings
+        """
+        chunks = []
+        window = deque()
+        window_len = 0
+        
+        for piece in self._pieces(text):
+            if window and window_len + len(piece) > self.chunk_size:
+                chunk = "".join(window).strip()
+                if chunk:
+                    chunks.append(chunk)
+                
+                # Keep only a tail that fits the overlap and leaves room for the piece
+                while window and (
+                    window_len > self.chunk_overlap
+                    or window_len + len(piece) > self.chunk_size
+                ):
+                    window_len -= len(window.popleft())
+            
+            window.append(piece)
+            window_len += len(piece)
+        
+        chunk = "".join(window).strip()
+        if chunk:
+            chunks.append(chunk)
+        
+        return chunks
+    
+    def _pieces(self, text: str) -> Iterator[str]:
+        """Yield sentence pieces, breaking any longer than chunk_size into words or slices."""
+        for match in _SENTENCE_RE.finditer(text):
+            sentence = match.group()
+            if len(sentence) <= self.chunk_size:
+                yield sentence
+                continue
+            
+            for word_match in _WORD_RE.finditer(sentence):
+                word = word_match.group()
+                if len(word) <= self.chunk_size:
+                    yield word
+                else:
+                    for start in range(0, len(word), self.chunk_size):
+                        yield word[start:start + self.chunk_size]
+    
+    def split_document(
+        self,
+        document: Dict[str, Any],
+        start_id: int = 0
+    ) -> List[Dict[str, Any]]:
         """
         Split a single document into chunks.
         
         Args:
             document: Dictionary with 'content' and 'metadata' keys
+            start_id: Integer id assigned to the first chunk (default: 0)
             
         Returns:
-            List of chunk dictionaries with content and metadata
+            List of chunk dictionaries with id, content and metadata
         """
         text = document['content']
         metadata = document.get('metadata', {})
         
         # Split the text
-        chunks = self.splitter.split_text(text)
+        chunks = self.split_text(text)
         
         # Create chunk documents with metadata
         chunk_documents = []
         for i, chunk in enumerate(chunks):
             chunk_doc = {
+                'id': start_id + i,
                 'content': chunk,
                 'metadata': {
                     **metadata,  # Preserve original metadata
@@ -72,8 +141,8 @@ class TextSplitter:
         all_chunks = []
         
         for doc in documents:
-            chunks = self.split_document(doc)
+            # Chunk ids are unique and monotonic across the whole corpus
+            chunks = self.split_document(doc, start_id=len(all_chunks))
             all_chunks.extend(chunks)
         
         return all_chunks
-
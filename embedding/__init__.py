@@ -1,6 +1,7 @@
 """Embedding generation module for RAG system."""
 
-from .embedder import Embedder
+from .embedder import Embedder, get_embedder
+from .batcher import EmbeddingBatcher
 
-__all__ = ['Embedder']
+__all__ = ['Embedder', 'EmbeddingBatcher', 'get_embedder']
 
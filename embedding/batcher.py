@@ -0,0 +1,94 @@
+"""Dynamic batching of concurrent query embeddings."""
+
+import asyncio
+from typing import List, Optional, Tuple
+import numpy as np
+from .embedder import Embedder
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent query embedding requests into batched encode calls."""
+    
+    def __init__(
+        self,
+        embedder: Embedder,
+        max_batch: int = 32,
+        max_wait_ms: float = 30.0
+    ):
+        """
+        Initialize embedding batcher.
+        
+        Args:
+            embedder: Embedder instance used to encode each batch
+            max_batch: Maximum number of queries encoded together (default: 32)
+            max_wait_ms: How long to wait for more queries once one arrives (default: 30)
+        """
+        self.embedder = embedder
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        """Start the background batching task on the running event loop."""
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop the background batching task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._queue = None
+    
+    async def embed(self, query: str) -> np.ndarray:
+        """
+        Embed a query, sharing a forward pass with concurrent callers.
+        
+        Args:
+            query: Search query string
+            
+        Returns:
+            Numpy array of shape (embedding_dim,)
+        """
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((query, future))
+        return await future
+    
+    async def _run(self):
+        """Collect queued queries into batches and resolve their futures."""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch: List[Tuple[str, asyncio.Future]] = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            
+            # Keep collecting until the batch is full or the wait window closes
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            queries = [query for query, _ in batch]
+            try:
+                # Encode off the event loop so requests keep queueing meanwhile
+                embeddings = await loop.run_in_executor(None, self.embedder.embed_queries, queries)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (_, future), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
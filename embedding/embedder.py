@@ -1,48 +1,180 @@
 """Text embedding generation using sentence-transformers."""
 
-from typing import List, Dict, Any
+import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
+import torch
 from sentence_transformers import SentenceTransformer
+from tqdm import tqdm
+
+
+logger = logging.getLogger(__name__)
+
+# Allow TF32 matmuls on Ampere+ GPUs (no effect on CPU)
+torch.set_float32_matmul_precision("high")
+
+
+# INT8 dynamically quantized ONNX exports shipped with the sentence-transformers
+# models, for CPUs with VNNI instructions and for plain AVX2 CPUs
+ONNX_QUANTIZED_VNNI_FILE = "onnx/model_qint8_avx512_vnni.onnx"
+ONNX_QUANTIZED_AVX2_FILE = "onnx/model_quint8_avx2.onnx"
+# FP32 ONNX export, used on GPU where the INT8 CPU kernels don't apply
+ONNX_FILE = "onnx/model.onnx"
 
 
 class Embedder:
-    """Generates embeddings for text using sentence-transformers."""
+    """Generates unit-length (L2-normalized) embeddings for text using sentence-transformers."""
     
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        backend: str = "onnx",
+        num_threads: Optional[int] = None,
+        query_cache_size: int = 4096
+    ):
         """
         Initialize embedder with a sentence-transformer model.
         
         Args:
             model_name: Name of the sentence-transformer model to use
                        Default: "all-MiniLM-L6-v2" (384 dimensions, fast)
+            backend: "onnx" for ONNX Runtime (INT8 quantized model on CPU,
+                     FP32 model on the CUDA execution provider when a GPU is
+                     usable), or "torch" for PyTorch inference
+                     Default: "onnx"
+            num_threads: Optional intra-op thread count for the ONNX backend
+            query_cache_size: Number of query embeddings kept in the LRU cache
+                              (0 disables caching)
         """
-        print(f"Loading embedding model: {model_name}...")
-        self.model = SentenceTransformer(model_name)
+        logger.info("Loading embedding model: %s (%s)...", model_name, backend)
+        if backend == "torch":
+            self.model = SentenceTransformer(model_name)
+            if self.model.device.type == "cuda":
+                # FP16 halves weight and activation memory traffic on GPU
+                self.model.half()
+        elif backend == "onnx":
+            provider, file_name = self._onnx_provider()
+            self.model = self._load_onnx(model_name, provider, file_name, num_threads)
+            if provider == "CUDAExecutionProvider" and provider not in self.model[0].auto_model.providers:
+                # ONNX Runtime falls back to CPU when the CUDA provider can't be
+                # created (e.g. missing CUDA/cuDNN libraries); run the INT8 model there
+                logger.warning("CUDA execution provider unavailable, using the CPU model")
+                self.model = self._load_onnx(
+                    model_name, "CPUExecutionProvider", self._onnx_cpu_file(), num_threads
+                )
+        else:
+            raise ValueError(f"Unsupported backend: {backend}. Supported: 'torch', 'onnx'")
         self.model_name = model_name
+        self.backend = backend
         self.embedding_dim = self.model.get_sentence_embedding_dimension()
-        print(f"Model loaded. Embedding dimension: {self.embedding_dim}")
+        self.query_cache_size = query_cache_size
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+        logger.info("Model loaded. Embedding dimension: %s", self.embedding_dim)
+    
+    @staticmethod
+    def _onnx_provider() -> Tuple[str, str]:
+        """Pick the ONNX Runtime execution provider and the model file to run on it."""
+        import onnxruntime as ort
+        
+        # onnxruntime-gpu lists the CUDA provider whether or not a GPU is present
+        if "CUDAExecutionProvider" in ort.get_available_providers() and torch.cuda.is_available():
+            return "CUDAExecutionProvider", ONNX_FILE
+        return "CPUExecutionProvider", Embedder._onnx_cpu_file()
+    
+    @staticmethod
+    def _onnx_cpu_file() -> str:
+        """Pick the INT8 model file whose quantization suits this CPU."""
+        try:
+            with open("/proc/cpuinfo") as file:
+                flags = set(file.read().split())
+        except OSError:
+            # No /proc/cpuinfo (Windows, macOS); AVX2 is the safe choice on x86-64
+            flags = set()
+        if flags & {"avx512_vnni", "avx_vnni"}:
+            return ONNX_QUANTIZED_VNNI_FILE
+        return ONNX_QUANTIZED_AVX2_FILE
+    
+    @staticmethod
+    def _load_onnx(
+        model_name: str,
+        provider: str,
+        file_name: str,
+        num_threads: Optional[int] = None
+    ) -> SentenceTransformer:
+        """Load the model's ONNX export onto the given execution provider."""
+        return SentenceTransformer(
+            model_name,
+            backend="onnx",
+            model_kwargs={
+                "file_name": file_name,
+                "provider": provider,
+                "session_options": Embedder._onnx_session_options(num_threads)
+            }
+        )
     
-    def embed_chunks(self, chunks: List[Dict[str, Any]]) -> np.ndarray:
+    @staticmethod
+    def _onnx_session_options(num_threads: Optional[int] = None):
+        """Build ONNX Runtime session options with full graph optimization."""
+        import onnxruntime as ort
+        
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        return options
+    
+    def embed_chunks(
+        self,
+        chunks: List[Dict[str, Any]],
+        batch_size: int = 64,
+        show_progress_bar: bool = True
+    ) -> np.ndarray:
         """
         Generate embeddings for a list of chunks.
         
+        Chunks with identical content (repeated boilerplate, duplicate files)
+        are tokenized and encoded once.
+        
         Args:
             chunks: List of chunk dictionaries with 'content' key
+            batch_size: Number of chunks encoded per forward pass (default: 64)
+            show_progress_bar: Show a progress bar over batches (default: True)
             
         Returns:
             Numpy array of shape (num_chunks, embedding_dim)
         """
-        # Extract text content from chunks
-        texts = [chunk['content'] for chunk in chunks]
-        
-        # Generate embeddings
-        embeddings = self.model.encode(
-            texts,
-            convert_to_numpy=True,
-            show_progress_bar=True
+        # Map each chunk to the first occurrence of its content
+        unique_index: Dict[str, int] = {}
+        inverse = np.fromiter(
+            (unique_index.setdefault(chunk['content'], len(unique_index)) for chunk in chunks),
+            dtype=np.intp,
+            count=len(chunks)
         )
+        texts = list(unique_index)
+        embeddings = np.empty((len(texts), self.embedding_dim), dtype=np.float32)
         
-        return embeddings
+        # Longest first, so each batch pads to lengths close to its own
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+        
+        # Generate embeddings batch by batch straight into the output array
+        for start in tqdm(range(0, len(order), batch_size), desc="Batches", disable=not show_progress_bar):
+            batch = order[start:start + batch_size]
+            embeddings[batch] = self.model.encode(
+                [texts[i] for i in batch],
+                batch_size=batch_size,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False
+            )
+        
+        # Fan unique embeddings back out to one row per chunk
+        if len(texts) == len(chunks):
+            return embeddings
+        return embeddings[inverse]
     
     def embed_query(self, query: str) -> np.ndarray:
         """
@@ -54,12 +186,62 @@ class Embedder:
         Returns:
             Numpy array of shape (embedding_dim,)
         """
-        embedding = self.model.encode(
-            query,
-            convert_to_numpy=True
-        )
+        return self.embed_queries([query])[0]
+    
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Generate embeddings for several search queries in one forward pass.
         
-        return embedding
+        Queries seen recently are served from the LRU cache; only the rest
+        are encoded.
+        
+        Args:
+            queries: List of search query strings
+            
+        Returns:
+            Numpy array of shape (num_queries, embedding_dim)
+        """
+        embeddings = np.empty((len(queries), self.embedding_dim), dtype=np.float32)
+        missing = []
+        
+        for i, query in enumerate(queries):
+            cached = self._cache_get(query)
+            if cached is None:
+                missing.append(i)
+            else:
+                embeddings[i] = cached
+        
+        if missing:
+            encoded = self.model.encode(
+                [queries[i] for i in missing],
+                batch_size=len(missing),
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False
+            )
+            for i, embedding in zip(missing, encoded):
+                embeddings[i] = embedding
+                self._cache_put(queries[i], embedding)
+        
+        return embeddings
+    
+    def _cache_get(self, query: str) -> Optional[np.ndarray]:
+        """Look up a query embedding, marking it as recently used."""
+        with self._query_cache_lock:
+            embedding = self._query_cache.get(query)
+            if embedding is not None:
+                self._query_cache.move_to_end(query)
+            return embedding
+    
+    def _cache_put(self, query: str, embedding: np.ndarray):
+        """Store a query embedding, evicting the least recently used one if full."""
+        if self.query_cache_size <= 0:
+            return
+        with self._query_cache_lock:
+            self._query_cache[query] = embedding
+            self._query_cache.move_to_end(query)
+            if len(self._query_cache) > self.query_cache_size:
+                self._query_cache.popitem(last=False)
     
     def embed_texts(self, texts: List[str]) -> np.ndarray:
         """
@@ -74,8 +256,23 @@ class Embedder:
         embeddings = self.model.encode(
             texts,
             convert_to_numpy=True,
+            normalize_embeddings=True,
             show_progress_bar=True
         )
         
         return embeddings
 
+
+@lru_cache(maxsize=4)
+def get_embedder(model_name: str = "all-MiniLM-L6-v2", backend: str = "onnx") -> Embedder:
+    """
+    Get a shared Embedder, loading the model only on first use in this process.
+    
+    Args:
+        model_name: Name of the sentence-transformer model to use
+        backend: "onnx" or "torch" (see Embedder)
+        
+    Returns:
+        Embedder instance shared by all callers with the same arguments
+    """
+    return Embedder(model_name=model_name, backend=backend)
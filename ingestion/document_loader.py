@@ -1,18 +1,46 @@
 """Document loader for extracting text from PDF and DOCX files."""
 
+import logging
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 import pypdf
 from docx import Document
 
 
+logger = logging.getLogger(__name__)
+
+
+def _extract_pages(page_range: Tuple[str, int, int]) -> List[str]:
+    """Extract text from a range of PDF pages (top-level so worker processes can run it)."""
+    file_path, start, stop = page_range
+    
+    with open(file_path, 'rb') as file:
+        pdf_reader = pypdf.PdfReader(file)
+        return [pdf_reader.pages[i].extract_text() for i in range(start, stop)]
+
+
 class DocumentLoader:
     """Loads and extracts text from PDF and DOCX files."""
     
-    def __init__(self):
-        """Initialize the document loader."""
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        min_pages_per_worker: int = 8
+    ):
+        """
+        Initialize the document loader.
+        
+        Args:
+            max_workers: Maximum processes used to extract PDF pages in parallel
+                         (default: number of CPUs; 1 disables parallel extraction)
+            min_pages_per_worker: Minimum pages handed to each process, so small
+                                  PDFs are extracted without process overhead
+        """
         self.supported_formats = {'.pdf', '.docx'}
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.min_pages_per_worker = min_pages_per_worker
     
     def load_document(self, file_path: str) -> Dict[str, Any]:
         """
@@ -46,15 +74,30 @@ class DocumentLoader:
     
     def _load_pdf(self, file_path: str) -> Dict[str, Any]:
         """Extract text from PDF file."""
-        content_pages = []
-        
         with open(file_path, 'rb') as file:
             pdf_reader = pypdf.PdfReader(file)
+            num_pages = len(pdf_reader.pages)
+            num_workers = min(self.max_workers, num_pages // self.min_pages_per_worker)
             
-            for page in pdf_reader.pages:
-                text = page.extract_text()
-                if text.strip():  # Only add non-empty pages
-                    content_pages.append(text)
+            if num_workers <= 1:
+                texts = [page.extract_text() for page in pdf_reader.pages]
+        
+        if num_workers > 1:
+            # Each worker re-opens the PDF and extracts a contiguous page range
+            pages_per_worker = -(-num_pages // num_workers)
+            page_ranges = [
+                (str(file_path), start, min(start + pages_per_worker, num_pages))
+                for start in range(0, num_pages, pages_per_worker)
+            ]
+            with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                texts = [
+                    text
+                    for range_texts in executor.map(_extract_pages, page_ranges)
+                    for text in range_texts
+                ]
+        
+        # Only keep non-empty pages
+        content_pages = [text for text in texts if text.strip()]
         
         # Join all pages with double newline
         full_content = '\n\n'.join(content_pages)
@@ -91,47 +134,80 @@ class DocumentLoader:
             }
         }
     
-    def load_documents(self, paths: List[str]) -> List[Dict[str, Any]]:
+    def load_single(self, file_path: str) -> Optional[Dict[str, Any]]:
         """
-        Load multiple documents from file paths and/or directories.
+        Load one document, reporting errors instead of raising them.
         
         Args:
-            paths: List of file paths and/or directory paths to load
+            file_path: Path to the document file
             
         Returns:
-            List of document dictionaries
+            Document dictionary, or None if the file could not be loaded
+        """
+        try:
+            doc = self.load_document(file_path)
+            logger.info("[OK] Loaded: %s", os.path.basename(file_path))
+            return doc
+        except Exception as e:
+            logger.error("[ERROR] Error loading %s: %s", file_path, e)
+            return None
+    
+    def collect_files(self, paths: List[str]) -> List[str]:
+        """
+        Expand file and directory paths into supported document files.
+        
+        Args:
+            paths: List of file paths and/or directory paths
+            
+        Returns:
+            List of file paths; files found in a directory are sorted by path
         """
-        # Collect all file paths (expand directories)
         file_paths = []
         
         for path_str in paths:
             path = Path(path_str)
             
             if not path.exists():
-                print(f"[ERROR] Path not found: {path_str}")
+                logger.error("[ERROR] Path not found: %s", path_str)
                 continue
             
             if path.is_dir():
-                # Find all supported files in directory
-                for file_path in path.iterdir():
-                    if file_path.is_file() and file_path.suffix.lower() in self.supported_formats:
-                        file_paths.append(str(file_path))
+                # Find all supported files in directory (DirEntry types come from
+                # the directory read itself, so no extra stat per file)
+                dir_files = []
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        ext = os.path.splitext(entry.name)[1].lower()
+                        if ext in self.supported_formats and entry.is_file():
+                            dir_files.append(entry.path)
+                file_paths.extend(sorted(dir_files))
             elif path.is_file():
                 # Add file if it's a supported format
                 if path.suffix.lower() in self.supported_formats:
                     file_paths.append(str(path))
                 else:
-                    print(f"[ERROR] Unsupported format: {path_str}")
+                    logger.error("[ERROR] Unsupported format: %s", path_str)
+        
+        return file_paths
+    
+    def load_documents(self, paths: List[str]) -> List[Dict[str, Any]]:
+        """
+        Load multiple documents from file paths and/or directories.
+        
+        Args:
+            paths: List of file paths and/or directory paths to load
+            
+        Returns:
+            List of document dictionaries
+        """
+        # Collect all file paths (expand directories)
+        file_paths = self.collect_files(paths)
         
         # Load all collected files
         documents = []
         for file_path in file_paths:
-            try:
-                doc = self.load_document(file_path)
+            doc = self.load_single(file_path)
+            if doc is not None:
                 documents.append(doc)
-                print(f"[OK] Loaded: {os.path.basename(file_path)}")
-            except Exception as e:
-                print(f"[ERROR] Error loading {file_path}: {e}")
         
         return documents
-
@@ -1,6 +1,7 @@
 """LLM client for generating responses using LLaMA via Ollama."""
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+import httpx
 import ollama
 
 
@@ -10,7 +11,9 @@ class LLMClient:
     def __init__(
         self,
         model: str = "llama3.2",
-        base_url: str = "http://localhost:11434"
+        base_url: str = "http://localhost:11434",
+        keep_alive: str = "30m",
+        num_ctx: int = 8192
     ):
         """
         Initialize LLM client with Ollama.
@@ -18,6 +21,9 @@ class LLMClient:
         Args:
             model: Model name to use (e.g., "llama3.2", "llama3.1", "llama2")
             base_url: Ollama server URL (default: localhost)
+            keep_alive: How long Ollama keeps the model loaded after a request
+            num_ctx: Context window size; kept fixed so Ollama can reuse the
+                     cached prompt prefix instead of reloading the model
         
         Note:
             Make sure Ollama is running and the model is pulled:
@@ -26,14 +32,17 @@ class LLMClient:
         """
         self.model = model
         self.base_url = base_url
-        # Set Ollama host if custom URL
-        if base_url != "http://localhost:11434":
-            import os
-            os.environ['OLLAMA_HOST'] = base_url
+        self.keep_alive = keep_alive
+        self.num_ctx = num_ctx
+        # Reuse one keep-alive connection pool per client instead of a fresh
+        # connection per call; sized so concurrent requests don't reconnect
+        limits = httpx.Limits(max_connections=16, max_keepalive_connections=16)
+        self._client = ollama.Client(host=base_url, limits=limits)
+        self._async_client = ollama.AsyncClient(host=base_url, limits=limits)
         
         # Verify connection (non-blocking - just a warning)
         try:
-            models = ollama.list()
+            models = self._client.list()
             if isinstance(models, dict) and 'models' in models:
                 model_names = [m.get('name', '') for m in models.get('models', [])]
                 if model not in model_names:
@@ -62,27 +71,113 @@ class LLMClient:
         Returns:
             Generated response text
         """
-        messages = []
+        messages = self._build_messages(prompt, system_prompt)
         
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
+        try:
+            response = self._client.chat(
+                model=self.model,
+                messages=messages,
+                options=self._options(max_tokens, temperature),
+                keep_alive=self.keep_alive
+            )
+            
+            return response['message']['content']
+        except Exception as e:
+            raise Exception(f"Error generating response: {e}")
+    
+    async def generate_async(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        max_tokens: int = 500,
+        temperature: float = 0.7
+    ) -> str:
+        """
+        Generate response from LLM without blocking the event loop.
         
-        messages.append({"role": "user", "content": prompt})
+        Args:
+            prompt: User prompt
+            system_prompt: Optional system prompt
+            max_tokens: Maximum tokens to generate
+            temperature: Temperature for generation (0.0-1.0)
+            
+        Returns:
+            Generated response text
+        """
+        messages = self._build_messages(prompt, system_prompt)
         
         try:
-            response = ollama.chat(
+            response = await self._async_client.chat(
                 model=self.model,
                 messages=messages,
-                options={
-                    "temperature": temperature,
-                    "num_predict": max_tokens
-                }
+                options=self._options(max_tokens, temperature),
+                keep_alive=self.keep_alive
             )
             
             return response['message']['content']
         except Exception as e:
             raise Exception(f"Error generating response: {e}")
     
+    def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        max_tokens: int = 500,
+        temperature: float = 0.7
+    ) -> Iterator[str]:
+        """
+        Generate response from LLM, yielding text as tokens arrive.
+        
+        Args:
+            prompt: User prompt
+            system_prompt: Optional system prompt
+            max_tokens: Maximum tokens to generate
+            temperature: Temperature for generation (0.0-1.0)
+            
+        Yields:
+            Pieces of the generated response text
+        """
+        messages = self._build_messages(prompt, system_prompt)
+        
+        try:
+            stream = self._client.chat(
+                model=self.model,
+                messages=messages,
+                options=self._options(max_tokens, temperature),
+                stream=True,
+                keep_alive=self.keep_alive
+            )
+            
+            for chunk in stream:
+                content = chunk['message']['content']
+                if content:
+                    yield content
+        except Exception as e:
+            raise Exception(f"Error generating response: {e}")
+    
+    def _options(self, max_tokens: int, temperature: float) -> Dict[str, Any]:
+        """Build the Ollama generation options for a request."""
+        return {
+            "temperature": temperature,
+            "num_predict": max_tokens,
+            "num_ctx": self.num_ctx
+        }
+    
+    def _build_messages(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None
+    ) -> List[Dict[str, str]]:
+        """Build the chat message list for a prompt."""
+        messages = []
+        
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        
+        messages.append({"role": "user", "content": prompt})
+        
+        return messages
+    
     def generate_with_context(
         self,
         query: str,
@@ -102,8 +197,80 @@ class LLMClient:
         Returns:
             Generated response text
         """
-        # Limit context chunks
-        limited_chunks = context_chunks[:max_context_chunks]
+        rag_prompt, system_prompt = self._build_rag_prompt(
+            query, context_chunks, system_prompt, max_context_chunks
+        )
+        
+        return self.generate(rag_prompt, system_prompt=system_prompt)
+    
+    async def generate_with_context_async(
+        self,
+        query: str,
+        context_chunks: List[Dict[str, Any]],
+        system_prompt: Optional[str] = None,
+        max_context_chunks: int = 5
+    ) -> str:
+        """
+        Generate response using RAG context without blocking the event loop.
+        
+        Args:
+            query: User query
+            context_chunks: List of retrieved context chunks
+            system_prompt: Optional system prompt
+            max_context_chunks: Maximum number of chunks to include
+            
+        Returns:
+            Generated response text
+        """
+        rag_prompt, system_prompt = self._build_rag_prompt(
+            query, context_chunks, system_prompt, max_context_chunks
+        )
+        
+        return await self.generate_async(rag_prompt, system_prompt=system_prompt)
+    
+    def generate_with_context_stream(
+        self,
+        query: str,
+        context_chunks: List[Dict[str, Any]],
+        system_prompt: Optional[str] = None,
+        max_context_chunks: int = 5
+    ) -> Iterator[str]:
+        """
+        Generate response using RAG context, yielding text as tokens arrive.
+        
+        Args:
+            query: User query
+            context_chunks: List of retrieved context chunks
+            system_prompt: Optional system prompt
+            max_context_chunks: Maximum number of chunks to include
+            
+        Yields:
+            Pieces of the generated response text
+        """
+        rag_prompt, system_prompt = self._build_rag_prompt(
+            query, context_chunks, system_prompt, max_context_chunks
+        )
+        
+        return self.generate_stream(rag_prompt, system_prompt=system_prompt)
+    
+    def _build_rag_prompt(
+        self,
+        query: str,
+        context_chunks: List[Dict[str, Any]],
+        system_prompt: Optional[str],
+        max_context_chunks: int
+    ) -> Tuple[str, str]:
+        """Build the RAG user prompt and system prompt from retrieved chunks."""
+        # Limit context chunks, then put them in source order. The system prompt
+        # and prompt template are static, so queries that retrieve the same
+        # chunks produce the same prompt prefix and Ollama reuses its KV cache
+        limited_chunks = sorted(
+            context_chunks[:max_context_chunks],
+            key=lambda chunk: (
+                chunk.get('metadata', {}).get('file_path', ''),
+                chunk.get('metadata', {}).get('chunk_index', 0)
+            )
+        )
         
         # Build context from chunks
         context_text = "\n\n".join([
@@ -131,5 +298,5 @@ Question: {query}
 
 Answer based on the context:"""
         
-        return self.generate(rag_prompt, system_prompt=system_prompt)
+        return rag_prompt, system_prompt
 
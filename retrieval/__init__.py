@@ -2,6 +2,7 @@
 
 from .retriever import Retriever
 from .query_rewriter import QueryRewriter
+from .query_expander import QueryExpander
 
-__all__ = ['Retriever', 'QueryRewriter']
+__all__ = ['Retriever', 'QueryRewriter', 'QueryExpander']
 
@@ -0,0 +1,61 @@
+"""Query expansion in embedding space, without an LLM call."""
+
+import hashlib
+from typing import Optional
+import numpy as np
+
+
+class QueryExpander:
+    """Expands a query embedding into nearby perturbed query vectors."""
+    
+    def __init__(self, noise_std: float = 0.02, seed: Optional[int] = None):
+        """
+        Initialize query expander.
+        
+        Args:
+            noise_std: Standard deviation of the Gaussian noise added per
+                       dimension, relative to the embedding norm (default: 0.02)
+            seed: Optional random seed for reproducible variations
+        """
+        self.noise_std = noise_std
+        self.seed = seed
+        self._rng = np.random.default_rng(seed)
+    
+    def expand(
+        self,
+        query_embedding: np.ndarray,
+        num_variations: int = 2,
+        query: Optional[str] = None
+    ) -> np.ndarray:
+        """
+        Generate perturbed variations of a query embedding.
+        
+        Args:
+            query_embedding: Query embedding of shape (embedding_dim,)
+            num_variations: Number of variations to generate (default: 2)
+            query: Optional query text; when given, the noise is seeded from it
+                   so the same query always gets the same variations
+            
+        Returns:
+            Numpy array of shape (num_variations + 1, embedding_dim),
+            with the original embedding first
+        """
+        query_embedding = np.asarray(query_embedding, dtype=np.float32)
+        if num_variations <= 0:
+            return query_embedding[np.newaxis, :]
+        
+        rng = self._rng
+        if query is not None:
+            query_seed = int.from_bytes(hashlib.sha256(query.encode("utf-8")).digest()[:8], "little")
+            rng = np.random.default_rng([self.seed or 0, query_seed])
+        
+        norm = np.linalg.norm(query_embedding)
+        noise = rng.normal(
+            0.0, self.noise_std * norm, size=(num_variations, query_embedding.shape[0])
+        ).astype(np.float32)
+        variations = query_embedding + noise
+        
+        # Keep the original length so scores stay comparable across variations
+        variations *= norm / np.linalg.norm(variations, axis=1, keepdims=True)
+        
+        return np.vstack([query_embedding, variations])
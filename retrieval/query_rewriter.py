@@ -7,6 +7,8 @@ from llm import LLMClient
 class QueryRewriter:
     """Rewrites queries using LLM to improve retrieval."""
     
+    SYSTEM_PROMPT = "You are a helpful assistant that rephrases questions for better document search."
+    
     def __init__(self, llm_client: LLMClient):
         """
         Initialize query rewriter.
@@ -34,41 +36,77 @@ class QueryRewriter:
         if num_variations == 0:
             return [query]
         
-        # Create prompt for query rephrasing
-        prompt = f"""Generate {num_variations} different ways to ask this question for document search. 
-Each variation should use different words but have the same meaning. 
-Focus on terms that might appear in formal documents.
-
-Original query: {query}
-
-Generate {num_variations} variations (one per line, no numbering):"""
-        
         try:
             # Generate variations
             response = self.llm_client.generate(
-                prompt=prompt,
-                system_prompt="You are a helpful assistant that rephrases questions for better document search.",
+                prompt=self._build_prompt(query, num_variations),
+                system_prompt=self.SYSTEM_PROMPT,
                 max_tokens=200,
                 temperature=0.7
             )
             
-            # Parse variations (split by newlines, clean up)
-            variations = [
-                line.strip()
-                for line in response.strip().split('\n')
-                if line.strip() and len(line.strip()) > 10  # Filter out empty/short lines
-            ]
+            return self._parse_variations(query, response, num_variations)
             
-            # Limit to requested number
-            variations = variations[:num_variations]
+        except Exception as e:
+            # If rephrasing fails, just return original query
+            print(f"Warning: Query rephrasing failed: {e}. Using original query.")
+            return [query]
+    
+    async def rephrase_async(
+        self,
+        query: str,
+        num_variations: int = 2
+    ) -> List[str]:
+        """
+        Generate query variations using LLM without blocking the event loop.
+        
+        Args:
+            query: Original query
+            num_variations: Number of variations to generate (default: 2)
             
-            # Combine with original query
-            all_queries = [query] + variations
+        Returns:
+            List of queries including original + variations
+        """
+        if num_variations == 0:
+            return [query]
+        
+        try:
+            response = await self.llm_client.generate_async(
+                prompt=self._build_prompt(query, num_variations),
+                system_prompt=self.SYSTEM_PROMPT,
+                max_tokens=200,
+                temperature=0.7
+            )
             
-            return all_queries
+            return self._parse_variations(query, response, num_variations)
             
         except Exception as e:
-            # If rephrasing fails, just return original query
             print(f"Warning: Query rephrasing failed: {e}. Using original query.")
             return [query]
+    
+    @staticmethod
+    def _build_prompt(query: str, num_variations: int) -> str:
+        """Create prompt for query rephrasing."""
+        return f"""Generate {num_variations} different ways to ask this question for document search. 
+Each variation should use different words but have the same meaning. 
+Focus on terms that might appear in formal documents.
+
+Original query: {query}
 
+Generate {num_variations} variations (one per line, no numbering):"""
+    
+    @staticmethod
+    def _parse_variations(query: str, response: str, num_variations: int) -> List[str]:
+        """Parse LLM output into the original query followed by its variations."""
+        # Parse variations (split by newlines, clean up)
+        variations = [
+            line.strip()
+            for line in response.strip().split('\n')
+            if line.strip() and len(line.strip()) > 10  # Filter out empty/short lines
+        ]
+        
+        # Limit to requested number
+        variations = variations[:num_variations]
+        
+        # Combine with original query
+        return [query] + variations
@@ -1,10 +1,12 @@
 """Retriever for semantic search over vector store."""
 
-from typing import List, Dict, Any, Tuple, Optional
+import asyncio
+from typing import List, Dict, Any, Tuple, Optional, FrozenSet
 import numpy as np
-from embedding import Embedder
+from embedding import Embedder, EmbeddingBatcher
 from storage import VectorStore
 from .query_rewriter import QueryRewriter
+from .query_expander import QueryExpander
 
 
 class Retriever:
@@ -14,7 +16,10 @@ class Retriever:
         self,
         vector_store: VectorStore,
         embedder: Embedder,
-        query_rewriter: Optional[QueryRewriter] = None
+        query_rewriter: Optional[QueryRewriter] = None,
+        embedding_batcher: Optional[EmbeddingBatcher] = None,
+        query_expander: Optional[QueryExpander] = None,
+        near_duplicate_threshold: Optional[float] = 0.85
     ):
         """
         Initialize retriever.
@@ -23,10 +28,20 @@ class Retriever:
             vector_store: VectorStore instance with stored embeddings
             embedder: Embedder instance for query embedding
             query_rewriter: Optional QueryRewriter for query rephrasing
+            embedding_batcher: Optional EmbeddingBatcher used by the async methods
+                               to share embedding passes across concurrent queries
+            query_expander: Optional QueryExpander used for query variations
+                            when no query_rewriter is set (no LLM call)
+            near_duplicate_threshold: Word 5-gram Jaccard similarity at which a
+                                      merged chunk is dropped as a near-duplicate
+                                      of a higher-scoring one (None disables)
         """
         self.vector_store = vector_store
         self.embedder = embedder
         self.query_rewriter = query_rewriter
+        self.embedding_batcher = embedding_batcher
+        self.query_expander = query_expander
+        self.near_duplicate_threshold = near_duplicate_threshold
     
     def retrieve(
         self,
@@ -48,19 +63,33 @@ class Retriever:
         # Generate query embedding
         query_embedding = self.embedder.embed_query(query)
         
-        # Search vector store
+        return self._with_scores(self._search(query_embedding, k=k, min_score=min_score))
+    
+    def _search(
+        self,
+        query_embedding: np.ndarray,
+        k: int,
+        min_score: float
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """Search the vector store with a precomputed query embedding."""
         results = self.vector_store.search(query_embedding, k=k)
         
-        # Filter by minimum score and format results
-        retrieved_chunks = []
-        for chunk, score in results:
-            if score >= min_score:
-                # Create a copy of chunk with similarity score
-                chunk_with_score = chunk.copy()
-                chunk_with_score['similarity_score'] = score
-                retrieved_chunks.append(chunk_with_score)
-        
-        return retrieved_chunks
+        # Filter by minimum score; chunks are not copied until the final results
+        return [(chunk, score) for chunk, score in results if score >= min_score]
+    
+    @staticmethod
+    def _with_scores(results: List[Tuple[Dict[str, Any], float]]) -> List[Dict[str, Any]]:
+        """Build output chunk dictionaries with an added 'similarity_score' key."""
+        return [{**chunk, 'similarity_score': score} for chunk, score in results]
+    
+    @staticmethod
+    def _chunk_id(chunk: Dict[str, Any]) -> Any:
+        """Return the chunk's integer id, or its source position for chunks stored without one."""
+        chunk_id = chunk.get('id')
+        if chunk_id is None:
+            metadata = chunk.get('metadata', {})
+            return (metadata.get('file_path'), metadata.get('chunk_index'))
+        return chunk_id
     
     def retrieve_with_scores(
         self,
@@ -93,6 +122,8 @@ class Retriever:
         Retrieve relevant chunks using query rephrasing.
         
         Generates multiple query variations, retrieves with each, and merges results.
+        Variations come from the query_rewriter (LLM) if set, otherwise from
+        the query_expander (embedding space).
         
         Args:
             query: Search query string
@@ -105,35 +136,169 @@ class Retriever:
             List of chunk dictionaries with similarity scores (merged and deduplicated)
         """
         if self.query_rewriter is None:
+            if self.query_expander is not None:
+                query_embedding = self.embedder.embed_query(query)
+                return self._search_expanded(
+                    query, query_embedding, k, min_score, num_variations, k_per_query
+                )
             # Fallback to regular retrieval if no rewriter
             return self.retrieve(query, k=k, min_score=min_score)
         
         # Generate query variations
         query_variations = self.query_rewriter.rephrase(query, num_variations=num_variations)
         
-        # Retrieve with each variation
-        all_results = {}  # Use dict to deduplicate by chunk content
+        # Embed all variations in a single batch, then search with each
+        query_embeddings = self.embedder.embed_queries(query_variations)
+        
+        result_lists = [
+            self._search(query_embedding, k=k_per_query, min_score=min_score)
+            for query_embedding in query_embeddings
+        ]
+        
+        return self._merge_results(result_lists, k)
+    
+    async def retrieve_async(
+        self,
+        query: str,
+        k: int = 5,
+        min_score: float = 0.0
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve relevant chunks for a query without blocking the event loop.
         
-        for q in query_variations:
-            chunks = self.retrieve(q, k=k_per_query, min_score=min_score)
+        Args:
+            query: Search query string
+            k: Number of results to return
+            min_score: Minimum similarity score threshold (0.0 to 1.0 for cosine)
             
-            for chunk in chunks:
-                # Use content as key for deduplication
-                content_key = chunk.get('content', '')[:100]  # First 100 chars as key
-                
-                if content_key not in all_results:
-                    all_results[content_key] = chunk
-                else:
-                    # Keep the chunk with higher similarity score
-                    existing_score = all_results[content_key].get('similarity_score', 0)
-                    new_score = chunk.get('similarity_score', 0)
-                    if new_score > existing_score:
-                        all_results[content_key] = chunk
-        
-        # Convert to list and sort by similarity score
-        merged_results = list(all_results.values())
-        merged_results.sort(key=lambda x: x.get('similarity_score', 0), reverse=True)
-        
-        # Return top k
-        return merged_results[:k]
-
+        Returns:
+            List of chunk dictionaries with added 'similarity_score' key
+        """
+        query_embedding = await self._embed_async(query)
+        return self._with_scores(self._search(query_embedding, k=k, min_score=min_score))
+    
+    async def retrieve_with_rephrasing_async(
+        self,
+        query: str,
+        k: int = 5,
+        min_score: float = 0.0,
+        num_variations: int = 2,
+        k_per_query: int = 3
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve relevant chunks using query rephrasing without blocking the event loop.
+        
+        Args:
+            query: Search query string
+            k: Final number of results to return
+            min_score: Minimum similarity score threshold
+            num_variations: Number of query variations to generate
+            k_per_query: Number of results to retrieve per query variation
+            
+        Returns:
+            List of chunk dictionaries with similarity scores (merged and deduplicated)
+        """
+        if self.query_rewriter is None:
+            if self.query_expander is not None:
+                query_embedding = await self._embed_async(query)
+                return self._search_expanded(
+                    query, query_embedding, k, min_score, num_variations, k_per_query
+                )
+            return await self.retrieve_async(query, k=k, min_score=min_score)
+        
+        # The original query doesn't depend on the rewriter, so search with it
+        # while the LLM generates variations
+        original_task = asyncio.create_task(self._embed_async(query))
+        rephrase_task = asyncio.create_task(
+            self.query_rewriter.rephrase_async(query, num_variations=num_variations)
+        )
+        original_embedding, query_variations = await asyncio.gather(original_task, rephrase_task)
+        
+        # Each variation joins whatever batch the embedding batcher is filling
+        variation_embeddings = await asyncio.gather(
+            *[self._embed_async(q) for q in query_variations[1:]]
+        )
+        
+        result_lists = [
+            self._search(query_embedding, k=k_per_query, min_score=min_score)
+            for query_embedding in [original_embedding, *variation_embeddings]
+        ]
+        
+        return self._merge_results(result_lists, k)
+    
+    def _search_expanded(
+        self,
+        query: str,
+        query_embedding: np.ndarray,
+        k: int,
+        min_score: float,
+        num_variations: int,
+        k_per_query: int
+    ) -> List[Dict[str, Any]]:
+        """Search with the query embedding and its expanded variations, then merge."""
+        # Variations are seeded from the query text, so repeated queries merge
+        # the same result lists and retrieve the same chunks
+        query_embeddings = self.query_expander.expand(query_embedding, num_variations, query=query)
+        
+        result_lists = [
+            self._search(variation, k=k_per_query, min_score=min_score)
+            for variation in query_embeddings
+        ]
+        
+        return self._merge_results(result_lists, k)
+    
+    async def _embed_async(self, query: str) -> np.ndarray:
+        """Embed a query through the batcher, or in a worker thread without one."""
+        if self.embedding_batcher is not None:
+            return await self.embedding_batcher.embed(query)
+        return await asyncio.get_running_loop().run_in_executor(None, self.embedder.embed_query, query)
+    
+    def _merge_results(
+        self,
+        result_lists: List[List[Tuple[Dict[str, Any], float]]],
+        k: int
+    ) -> List[Dict[str, Any]]:
+        """Merge per-variation results, keeping the best score for each chunk."""
+        best: Dict[Any, Tuple[Dict[str, Any], float]] = {}  # chunk id -> (chunk, score)
+        
+        for results in result_lists:
+            for chunk, score in results:
+                chunk_id = self._chunk_id(chunk)
+                existing = best.get(chunk_id)
+                if existing is None or score > existing[1]:
+                    best[chunk_id] = (chunk, score)
+        
+        # Walk candidates best-first, skipping near-duplicates of chunks already
+        # kept so repeated text doesn't take context slots in the LLM prompt
+        top_results: List[Tuple[Dict[str, Any], float]] = []
+        kept_shingles: List[FrozenSet[Tuple[str, ...]]] = []
+        
+        for chunk, score in sorted(best.values(), key=lambda item: item[1], reverse=True):
+            if len(top_results) == k:
+                break
+            if self.near_duplicate_threshold is not None:
+                shingles = self._shingles(chunk.get('content', ''))
+                if any(
+                    self._jaccard(shingles, kept) >= self.near_duplicate_threshold
+                    for kept in kept_shingles
+                ):
+                    continue
+                kept_shingles.append(shingles)
+            top_results.append((chunk, score))
+        
+        return self._with_scores(top_results)
+    
+    @staticmethod
+    def _shingles(text: str, n: int = 5) -> FrozenSet[Tuple[str, ...]]:
+        """Return the set of word n-grams in a text (the whole text if shorter than n words)."""
+        words = text.lower().split()
+        if len(words) < n:
+            return frozenset([tuple(words)])
+        return frozenset(tuple(words[i:i + n]) for i in range(len(words) - n + 1))
+    
+    @staticmethod
+    def _jaccard(a: FrozenSet[Tuple[str, ...]], b: FrozenSet[Tuple[str, ...]]) -> float:
+        """Jaccard similarity of two shingle sets."""
+        if not a and not b:
+            return 1.0
+        return len(a & b) / len(a | b)
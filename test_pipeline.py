@@ -1,12 +1,268 @@
 """Complete test script for RAG pipeline (ingestion -> chunking -> embedding -> storage)."""
 
-from ingestion import DocumentLoader
-from chunking import TextSplitter
-from embedding import Embedder
+import hashlib
+import logging
+import os
+import pickle
+import queue
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+# Ingestion, chunking and embedding modules are imported in the steps that use
+# them, so runs with supplied or cached inputs skip loading torch and the PDF libs
 from storage import VectorStore
 
 
-def test_pipeline(docs=None, chunks=None, embeddings=None):
+# Step progress is logged at INFO and document/chunk previews at DEBUG; run
+# with LOGLEVEL=INFO or LOGLEVEL=DEBUG to see them
+log = logging.getLogger("rag.test")
+
+DATA_DIR = "data/"
+CHUNK_SIZE = 1500
+CHUNK_OVERLAP = 300
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+# Same backend as the API, so stored and query embeddings come from the same model
+EMBEDDING_BACKEND = "onnx"
+EMBEDDING_BATCH_SIZE = 128
+
+# Documents or chunk batches buffered between streaming stages
+STREAM_QUEUE_SIZE = 4
+
+# Stage outputs are cached here, keyed by a hash of their inputs
+CACHE_DIR = Path(".cache")
+# Bump when the format of cached documents, chunks or embeddings changes
+SCHEMA_VERSION = 1
+
+
+def _corpus_hash(data_dir):
+    """Hash every file under data_dir by path, mtime, size and content."""
+    digest = hashlib.sha256(f"v{SCHEMA_VERSION}".encode())
+    for path in sorted(p for p in Path(data_dir).rglob("*") if p.is_file()):
+        stat = path.stat()
+        digest.update(f"{path.as_posix()}|{stat.st_mtime_ns}|{stat.st_size}|".encode())
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def _content_hash(items):
+    """Hash the content (and source file name) of documents or chunks."""
+    digest = hashlib.sha256(f"v{SCHEMA_VERSION}".encode())
+    for item in items:
+        digest.update(item.get('metadata', {}).get('file_name', '').encode())
+        digest.update(b"\0")
+        digest.update(item['content'].encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+def _store_hash(embeddings, chunks):
+    """Hash everything a saved vector store is built from."""
+    digest = hashlib.blake2b(np.ascontiguousarray(embeddings).view(np.uint8), digest_size=16)
+    digest.update(f"|{len(chunks)}|{_content_hash(chunks)}".encode())
+    return digest.hexdigest()
+
+
+def _store_is_current(save_path, store_hash):
+    """Check whether the vector store saved at save_path was built from the same inputs."""
+    hash_path = Path(f"{save_path}.hash")
+    if not hash_path.exists():
+        return False
+    if not all(Path(f"{save_path}{suffix}").exists() for suffix in (".index", ".chunks", ".meta")):
+        return False
+    return hash_path.read_text().strip() == store_hash
+
+
+def _save_store_hash(save_path, store_hash):
+    """Record the inputs hash of a saved vector store, written atomically."""
+    hash_path = Path(f"{save_path}.hash")
+    tmp_path = hash_path.with_name(hash_path.name + ".tmp")
+    tmp_path.write_text(store_hash)
+    os.replace(tmp_path, hash_path)
+
+
+def _load_pickle(path):
+    with open(path, "rb") as file:
+        return pickle.load(file)
+
+
+def _save_pickle(path, obj):
+    """Write a pickle atomically so an interrupted run never leaves a partial cache file."""
+    CACHE_DIR.mkdir(exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as file:
+        pickle.dump(obj, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def _save_npy(path, array):
+    """Write a .npy file atomically."""
+    CACHE_DIR.mkdir(exist_ok=True)
+    tmp_path = path.with_name(path.stem + ".tmp.npy")
+    np.save(tmp_path, array)
+    os.replace(tmp_path, path)
+
+
+def _file_loader(num_files):
+    """
+    Build the DocumentLoader each file-loading process uses.
+    
+    Cores not taken by the one-process-per-file pool go to page-level PDF
+    extraction, so a large PDF among a few files is still split across cores.
+    """
+    from ingestion import DocumentLoader
+    
+    return DocumentLoader(max_workers=max(1, (os.cpu_count() or 1) // max(num_files, 1)))
+
+
+def _load_files(files):
+    """
+    Load files in parallel worker processes, one process per file.
+    
+    Args:
+        files: Paths of the files to load
+    
+    Yields:
+        Loaded documents in file order, skipping files that failed to load
+    """
+    if not files:
+        return
+    loader = _file_loader(len(files))
+    with ProcessPoolExecutor(max_workers=min(len(files), os.cpu_count() or 1)) as executor:
+        for doc in executor.map(loader.load_single, files, chunksize=1):
+            if doc is not None:
+                yield doc
+
+
+def _stream_stages(data_dir=DATA_DIR):
+    """
+    Load, chunk and embed documents as overlapping stages.
+    
+    Documents are loaded in worker processes and chunked in a thread as they
+    arrive, while the calling thread embeds full chunk batches, so chunking
+    and embedding start before the last document is loaded.
+    
+    Args:
+        data_dir: Directory of documents to load
+    
+    Returns:
+        Tuple of (docs, chunks, embeddings)
+    """
+    from ingestion import DocumentLoader
+    from chunking import TextSplitter
+    from embedding import get_embedder
+    
+    # Sorted file order keeps document order (and chunk ids) deterministic
+    files = DocumentLoader().collect_files([data_dir])
+    
+    doc_queue = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+    batch_queue = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+    docs, chunks, errors = [], [], []
+    
+    def ingest():
+        try:
+            for doc in _load_files(files):
+                docs.append(doc)
+                doc_queue.put(doc)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            doc_queue.put(None)
+    
+    def chunk():
+        splitter = TextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+        pending = []
+        try:
+            while (doc := doc_queue.get()) is not None:
+                # Chunk ids are unique and monotonic across the whole corpus
+                doc_chunks = splitter.split_document(doc, start_id=len(chunks))
+                chunks.extend(doc_chunks)
+                pending.extend(doc_chunks)
+                while len(pending) >= EMBEDDING_BATCH_SIZE:
+                    batch_queue.put(pending[:EMBEDDING_BATCH_SIZE])
+                    pending = pending[EMBEDDING_BATCH_SIZE:]
+            if pending:
+                batch_queue.put(pending)
+        except Exception as e:
+            errors.append(e)
+            # Unblock the ingest thread if it is waiting on a full queue
+            while doc_queue.get() is not None:
+                pass
+        finally:
+            batch_queue.put(None)
+    
+    embedder = get_embedder(EMBEDDING_MODEL, backend=EMBEDDING_BACKEND)
+    threads = [threading.Thread(target=ingest), threading.Thread(target=chunk)]
+    for thread in threads:
+        thread.start()
+    
+    embedding_batches = []
+    try:
+        while (batch := batch_queue.get()) is not None:
+            embedding_batches.append(
+                embedder.embed_chunks(batch, batch_size=EMBEDDING_BATCH_SIZE, show_progress_bar=False)
+            )
+    except Exception:
+        # Drain so the stage threads don't block on a full queue
+        while batch_queue.get() is not None:
+            pass
+        raise
+    finally:
+        for thread in threads:
+            thread.join()
+    
+    if errors:
+        raise errors[0]
+    
+    if embedding_batches:
+        embeddings = np.concatenate(embedding_batches)
+    else:
+        embeddings = np.empty((0, embedder.embedding_dim), dtype=np.float32)
+    return docs, chunks, embeddings
+
+
+def test_pipeline_streaming():
+    """
+    Test the pipeline with ingestion, chunking and embedding run as overlapping stages.
+    
+    Faster than test_pipeline() on a cold build of a large data/ folder; the
+    per-stage caches in .cache/ are neither read nor written. Selected by
+    running this script with STREAMING=1.
+    
+    Returns:
+        Tuple of (docs, chunks, embeddings, vector_store) for reuse
+    """
+    log.info("=" * 60)
+    log.info("[STEPS 1-3] Streaming Ingestion -> Chunking -> Embedding")
+    log.info("=" * 60)
+    
+    try:
+        docs, chunks, embeddings = _stream_stages(DATA_DIR)
+    except Exception as e:
+        log.error("[ERROR] Error in streaming pipeline: %s", e)
+        return None, None, None, None
+    
+    if len(docs) == 0:
+        log.error("[ERROR] No documents found in data/ folder")
+        return None, None, None, None
+    if len(chunks) == 0:
+        log.error("[ERROR] No chunks created")
+        return docs, None, None, None
+    
+    log.info("[OK] Loaded %s documents, created %s chunks, generated embeddings %s\n",
+             len(docs), len(chunks), embeddings.shape)
+    
+    return test_pipeline(
+        docs=docs, chunks=chunks, embeddings=embeddings, use_cache=False
+    )
+
+
+def test_pipeline(docs=None, chunks=None, embeddings=None, use_cache=True):
     """
     Test the complete pipeline up to vector storage.
     
@@ -14,115 +270,166 @@ def test_pipeline(docs=None, chunks=None, embeddings=None):
         docs: Optional pre-loaded documents (skip ingestion if provided)
         chunks: Optional pre-created chunks (skip chunking if provided)
         embeddings: Optional pre-generated embeddings (skip embedding if provided)
+        use_cache: Reuse documents, chunks and embeddings cached in .cache/ by
+                   earlier runs with the same inputs (default: True)
     
     Returns:
         Tuple of (docs, chunks, embeddings, vector_store) for reuse
     """
     
-    print("=" * 60)
-    print("RAG Pipeline Test: Ingestion -> Chunking -> Embedding -> Storage")
-    print("=" * 60)
+    log.info("=" * 60)
+    log.info("RAG Pipeline Test: Ingestion -> Chunking -> Embedding -> Storage")
+    log.info("=" * 60)
     
-    # Step 1: Document Ingestion (skip if docs provided)
-    if docs is None:
-        print("\n[STEP 1] Document Ingestion")
-        print("-" * 60)
-        loader = DocumentLoader()
+    # Step 1: Document Ingestion (skip if docs provided or cached)
+    docs_cache = None
+    if docs is None and use_cache:
+        docs_cache = CACHE_DIR / f"docs_{_corpus_hash(DATA_DIR)}.pkl"
+    
+    if docs_cache is not None and docs_cache.exists():
+        log.info("\n[STEP 1] Document Ingestion (using cache)")
+        log.info("-" * 60)
+        docs = _load_pickle(docs_cache)
+        log.info("[OK] Loaded %s documents from %s", len(docs), docs_cache)
+    elif docs is None:
+        log.info("\n[STEP 1] Document Ingestion")
+        log.info("-" * 60)
+        from ingestion import DocumentLoader
         
         try:
-            docs = loader.load_documents(["data/"])
-            print(f"\n[OK] Successfully loaded {len(docs)} documents")
+            # Sorted file order keeps document order (and chunk ids) deterministic
+            files = DocumentLoader().collect_files([DATA_DIR])
+            docs = list(_load_files(files))
+            log.info("\n[OK] Successfully loaded %s documents", len(docs))
             
             # Show document stats
-            for i, doc in enumerate(docs, 1):
-                content_len = len(doc['content'])
-                metadata = doc['metadata']
-                print(f"\n  Document {i}:")
-                print(f"    File: {metadata['file_name']}")
-                print(f"    Type: {metadata['file_type']}")
-                print(f"    Content length: {content_len:,} characters")
-                if 'num_pages' in metadata:
-                    print(f"    Pages: {metadata['num_pages']}")
-                print(f"    Preview: {doc['content'][:150]}...")
+            if log.isEnabledFor(logging.DEBUG):
+                for i, doc in enumerate(docs, 1):
+                    content_len = len(doc['content'])
+                    metadata = doc['metadata']
+                    log.debug("\n  Document %s:", i)
+                    log.debug("    File: %s", metadata['file_name'])
+                    log.debug("    Type: %s", metadata['file_type'])
+                    log.debug("    Content length: %s characters", format(content_len, ","))
+                    if 'num_pages' in metadata:
+                        log.debug("    Pages: %s", metadata['num_pages'])
+                    log.debug("    Preview: %s...", doc['content'][:150])
             
             if len(docs) == 0:
-                print("[ERROR] No documents found in data/ folder")
-                return None, None, None
+                log.error("[ERROR] No documents found in data/ folder")
+                return None, None, None, None
+            
+            if docs_cache is not None:
+                _save_pickle(docs_cache, docs)
             
         except Exception as e:
-            print(f"[ERROR] Error in ingestion: {e}")
-            return None, None, None
+            log.error("[ERROR] Error in ingestion: %s", e)
+            return None, None, None, None
     else:
-        print("\n[STEP 1] Document Ingestion (using provided documents)")
-        print("-" * 60)
-        print(f"[OK] Using {len(docs)} pre-loaded documents")
-    
-    # Step 2: Chunking (skip if chunks provided, use docs from step 1)
-    if chunks is None:
-        print("\n\n[STEP 2] Text Chunking")
-        print("-" * 60)
-        splitter = TextSplitter(chunk_size=1500, chunk_overlap=300)
+        log.info("\n[STEP 1] Document Ingestion (using provided documents)")
+        log.info("-" * 60)
+        log.info("[OK] Using %s pre-loaded documents", len(docs))
+    
+    # Step 2: Chunking (skip if chunks provided or cached, use docs from step 1)
+    chunks_cache = None
+    if chunks is None and use_cache:
+        chunks_cache = CACHE_DIR / f"chunks_{_content_hash(docs)}_{CHUNK_SIZE}_{CHUNK_OVERLAP}.pkl"
+    
+    if chunks_cache is not None and chunks_cache.exists():
+        log.info("\n\n[STEP 2] Text Chunking (using cache)")
+        log.info("-" * 60)
+        chunks = _load_pickle(chunks_cache)
+        log.info("[OK] Loaded %s chunks from %s", len(chunks), chunks_cache)
+    elif chunks is None:
+        log.info("\n\n[STEP 2] Text Chunking")
+        log.info("-" * 60)
+        from chunking import TextSplitter
+        
+        splitter = TextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
         
         try:
             chunks = splitter.split_documents(docs)
-            print(f"\n[OK] Successfully created {len(chunks)} chunks from {len(docs)} documents")
+            log.info("\n[OK] Successfully created %s chunks from %s documents", len(chunks), len(docs))
+            
+            if len(chunks) == 0:
+                log.error("[ERROR] No chunks created")
+                return docs, None, None, None
             
             # Show chunk stats
-            chunk_lengths = [len(chunk['content']) for chunk in chunks]
-            print(f"\n  Chunk Statistics:")
-            print(f"    Average length: {sum(chunk_lengths) / len(chunk_lengths):.0f} characters")
-            print(f"    Min length: {min(chunk_lengths)} characters")
-            print(f"    Max length: {max(chunk_lengths)} characters")
+            chunk_lengths = np.fromiter(
+                (len(chunk['content']) for chunk in chunks), dtype=np.int32, count=len(chunks)
+            )
+            log.info("\n  Chunk Statistics:")
+            log.info("    Average length: %.0f characters", chunk_lengths.mean())
+            log.info("    Min length: %s characters", chunk_lengths.min())
+            log.info("    Max length: %s characters", chunk_lengths.max())
             
-            print(f"\n  First 3 chunks preview:")
+            log.debug("\n  First 3 chunks preview:")
             for i in range(min(3, len(chunks))):
                 chunk = chunks[i]
-                print(f"\n    Chunk {i+1} (index {chunk['metadata']['chunk_index']}):")
-                print(f"      Length: {len(chunk['content'])} chars")
-                print(f"      From: {chunk['metadata']['file_name']}")
-                print(f"      Preview: {chunk['content'][:100]}...")
+                log.debug("\n    Chunk %s (index %s):", i+1, chunk['metadata']['chunk_index'])
+                log.debug("      Length: %s chars", len(chunk['content']))
+                log.debug("      From: %s", chunk['metadata']['file_name'])
+                log.debug("      Preview: %s...", chunk['content'][:100])
             
-            if len(chunks) == 0:
-                print("[ERROR] No chunks created")
-                return docs, None, None
+            if chunks_cache is not None:
+                _save_pickle(chunks_cache, chunks)
             
         except Exception as e:
-            print(f"[ERROR] Error in chunking: {e}")
-            return docs, None, None
+            log.error("[ERROR] Error in chunking: %s", e)
+            return docs, None, None, None
     else:
-        print("\n\n[STEP 2] Text Chunking (using provided chunks)")
-        print("-" * 60)
-        print(f"[OK] Using {len(chunks)} pre-created chunks")
-    
-    # Step 3: Embeddings (use chunks from step 2)
-    if embeddings is None:
-        print("\n\n[STEP 3] Embedding Generation")
-        print("-" * 60)
-        embedder = Embedder(model_name="all-MiniLM-L6-v2")
+        log.info("\n\n[STEP 2] Text Chunking (using provided chunks)")
+        log.info("-" * 60)
+        log.info("[OK] Using %s pre-created chunks", len(chunks))
+    
+    # Step 3: Embeddings (skip if embeddings provided or cached, use chunks from step 2)
+    embeddings_cache = None
+    if embeddings is None and use_cache:
+        embeddings_cache = CACHE_DIR / f"emb_{_content_hash(chunks)}_{EMBEDDING_MODEL}_{EMBEDDING_BACKEND}.npy"
+    
+    if embeddings_cache is not None and embeddings_cache.exists():
+        log.info("\n\n[STEP 3] Embedding Generation (using cache)")
+        log.info("-" * 60)
+        embeddings = np.load(embeddings_cache)
+        log.info("[OK] Loaded embeddings %s from %s", embeddings.shape, embeddings_cache)
+    elif embeddings is None:
+        log.info("\n\n[STEP 3] Embedding Generation")
+        log.info("-" * 60)
+        from embedding import get_embedder
+        
+        embedder = get_embedder(EMBEDDING_MODEL, backend=EMBEDDING_BACKEND)
         
         try:
-            print("\n  Generating embeddings (this may take a moment)...")
-            embeddings = embedder.embed_chunks(chunks)
+            log.info("\n  Generating embeddings (this may take a moment)...")
+            # The progress bar follows the step progress messages (shown at INFO)
+            embeddings = embedder.embed_chunks(
+                chunks,
+                batch_size=EMBEDDING_BATCH_SIZE,
+                show_progress_bar=log.isEnabledFor(logging.INFO)
+            )
+            if embeddings_cache is not None:
+                _save_npy(embeddings_cache, embeddings)
             
-            print(f"\n[OK] Successfully generated embeddings")
-            print(f"\n  Embedding Statistics:")
-            print(f"    Shape: {embeddings.shape}")
-            print(f"    Number of embeddings: {embeddings.shape[0]}")
-            print(f"    Embedding dimension: {embeddings.shape[1]}")
-            print(f"    First embedding (first 5 values): {embeddings[0][:5]}")
-            print(f"    Embedding range: [{embeddings.min():.4f}, {embeddings.max():.4f}]")
+            log.info("\n[OK] Successfully generated embeddings")
+            log.info("\n  Embedding Statistics:")
+            log.info("    Shape: %s", embeddings.shape)
+            log.info("    Number of embeddings: %s", embeddings.shape[0])
+            log.info("    Embedding dimension: %s", embeddings.shape[1])
+            log.info("    First embedding (first 5 values): %s", embeddings[0][:5])
+            log.info("    Embedding range: [%.4f, %.4f]", embeddings.min(), embeddings.max())
             
         except Exception as e:
-            print(f"[ERROR] Error in embedding: {e}")
+            log.error("[ERROR] Error in embedding: %s", e)
             return docs, chunks, None, None
     else:
-        print("\n\n[STEP 3] Embedding Generation (using provided embeddings)")
-        print("-" * 60)
-        print(f"[OK] Using pre-generated embeddings: {embeddings.shape}")
+        log.info("\n\n[STEP 3] Embedding Generation (using provided embeddings)")
+        log.info("-" * 60)
+        log.info("[OK] Using pre-generated embeddings: %s", embeddings.shape)
     
     # Step 4: Vector Storage (use embeddings and chunks from previous steps)
-    print("\n\n[STEP 4] Vector Storage")
-    print("-" * 60)
+    log.info("\n\n[STEP 4] Vector Storage")
+    log.info("-" * 60)
     
     try:
         # Initialize vector store
@@ -132,34 +439,42 @@ def test_pipeline(docs=None, chunks=None, embeddings=None):
         )
         
         # Add vectors and chunks
-        print("\n  Adding vectors to store...")
+        log.info("\n  Adding vectors to store...")
         vector_store.add_vectors(embeddings, chunks)
         
-        print(f"\n[OK] Successfully stored vectors")
+        log.info("\n[OK] Successfully stored vectors")
         stats = vector_store.get_stats()
-        print(f"\n  Vector Store Statistics:")
-        print(f"    Number of vectors: {stats['num_vectors']}")
-        print(f"    Embedding dimension: {stats['embedding_dim']}")
-        print(f"    Similarity metric: {stats['similarity_metric']}")
+        log.info("\n  Vector Store Statistics:")
+        log.info("    Number of vectors: %s", stats['num_vectors'])
+        log.info("    Embedding dimension: %s", stats['embedding_dim'])
+        log.info("    Similarity metric: %s", stats['similarity_metric'])
         
         # Test search
-        print(f"\n  Testing search functionality...")
+        log.info("\n  Testing search functionality...")
         test_query_embedding = embeddings[0]  # Use first embedding as test query
         results = vector_store.search(test_query_embedding, k=3)
-        print(f"    Found {len(results)} results for test query")
-        print(f"    Top result similarity: {results[0][1]:.4f}")
+        log.info("    Found %s results for test query", len(results))
+        log.info("    Top result similarity: %.4f", results[0][1])
         
-        # Save to disk
-        print(f"\n  Saving vector store to disk...")
+        # Save to disk, unless the saved store already has these vectors and chunks
         save_path = "vector_store"
-        vector_store.save(save_path)
-        print(f"    [OK] Saved to: {save_path}.index, {save_path}.chunks, {save_path}.meta")
-        print(f"    - Embeddings: {save_path}.index")
-        print(f"    - Chunks with metadata: {save_path}.chunks")
-        print(f"    - Store metadata: {save_path}.meta")
+        store_hash = _store_hash(embeddings, chunks)
+        if _store_is_current(save_path, store_hash):
+            log.info("\n  [OK] Vector store on disk is up to date, skipping save: %s", save_path)
+        else:
+            log.info("\n  Saving vector store to disk...")
+            # Drop the old hash first so an interrupted save is never taken as current
+            Path(f"{save_path}.hash").unlink(missing_ok=True)
+            vector_store.save(save_path)
+            _save_store_hash(save_path, store_hash)
+            log.info("    [OK] Saved to: %s.index, %s.chunks, %s.meta", save_path, save_path, save_path)
+            log.info("    - Embeddings: %s.index", save_path)
+            log.info("    - Chunks with metadata: %s.chunks", save_path)
+            log.info("    - Store metadata: %s.meta", save_path)
+            log.info("    - Inputs hash: %s.hash", save_path)
         
     except Exception as e:
-        print(f"[ERROR] Error in vector storage: {e}")
+        log.error("[ERROR] Error in vector storage: %s", e)
         return docs, chunks, embeddings, None
     
     # Summary
@@ -178,8 +493,18 @@ def test_pipeline(docs=None, chunks=None, embeddings=None):
 
 
 if __name__ == "__main__":
-    # Run full pipeline
-    docs, chunks, embeddings, vector_store = test_pipeline()
+    # UTF-8 output so document previews print on Windows consoles
+    sys.stdout.reconfigure(encoding="utf-8")
+    logging.basicConfig(
+        level=os.getenv("LOGLEVEL", "WARNING").upper(), format="%(message)s", stream=sys.stdout
+    )
+    
+    # Run full pipeline; STREAMING=1 overlaps ingestion, chunking and embedding
+    # (faster for a cold build of a large corpus, but skips the .cache/ stages)
+    if os.getenv("STREAMING", "").lower() in ("1", "true", "yes"):
+        docs, chunks, embeddings, vector_store = test_pipeline_streaming()
+    else:
+        docs, chunks, embeddings, vector_store = test_pipeline()
     
     # Example: Reuse results for further testing
     # if docs and chunks and embeddings is not None and vector_store is not None:
@@ -1,47 +1,211 @@
 """Test script for complete RAG pipeline (Retrieval + LLM)."""
 
+import asyncio
+import hashlib
+import logging
+import os
+import pickle
+import shelve
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+
 from storage import VectorStore
-from embedding import Embedder
+from embedding import get_embedder, EmbeddingBatcher
 from retrieval import Retriever, QueryRewriter
 from llm import LLMClient
 
-# Fix Unicode encoding for Windows console
-def safe_print(text):
-    """Print text safely handling Unicode characters."""
-    try:
-        # Try UTF-8 first
-        print(text)
-    except UnicodeEncodeError:
-        # Fallback to ASCII with error handling
-        safe_text = text.encode('ascii', errors='replace').decode('ascii')
-        print(safe_text)
+# Query embeddings and rephrased variations persist here between runs
+QUERY_CACHE_PATH = ".qcache"
+# Retrieval results persist here, one subdirectory per vector store version
+RETRIEVAL_CACHE_DIR = Path(".rcache")
+VECTOR_STORE_PATH = "vector_store"
+# Maximum LLM calls (rephrasing or answering) in flight at the same time
+MAX_CONCURRENT_LLM_CALLS = 4
+
+# Shelve is not thread-safe; the embedding batcher encodes in a worker thread
+_cache_lock = threading.Lock()
+
+
+def _query_key(kind, *parts):
+    """Build a shelve key from a SHA-256 of the query and its parameters."""
+    raw = "\0".join(str(part) for part in parts)
+    return f"{kind}:{hashlib.sha256(raw.encode('utf-8')).hexdigest()}"
+
+
+def _store_hash(store_path):
+    """Identify the saved vector store version so cached results follow corpus changes."""
+    files = [store_path + suffix for suffix in (".index", ".chunks")]
+    
+    # test_pipeline records an inputs hash next to the store; trust it unless
+    # the store files were written after it
+    hash_path = store_path + ".hash"
+    if os.path.exists(hash_path) and all(
+        os.path.getmtime(path) <= os.path.getmtime(hash_path) for path in files
+    ):
+        with open(hash_path) as file:
+            return file.read().strip()[:16]
+    
+    digest = hashlib.sha256()
+    for path in files:
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+async def cached_retrieve_with_rephrasing(retriever, store_hash, query, **params):
+    """Run retriever.retrieve_with_rephrasing_async, reusing results saved for this store version."""
+    params = {
+        **params,
+        "model": retriever.embedder.model_name,
+        "backend": retriever.embedder.backend,
+        "near_duplicate_threshold": retriever.near_duplicate_threshold,
+    }
+    raw = "\0".join([query] + [f"{name}={params[name]}" for name in sorted(params)])
+    cache_path = RETRIEVAL_CACHE_DIR / store_hash / f"{hashlib.sha256(raw.encode('utf-8')).hexdigest()}.pkl"
+    if cache_path.exists():
+        with open(cache_path, "rb") as file:
+            return pickle.load(file)
+    
+    num_variations = params["num_variations"]
+    results = await retriever.retrieve_with_rephrasing_async(
+        query=query,
+        k=params["k"],
+        min_score=params["min_score"],
+        num_variations=num_variations,
+        k_per_query=params["k_per_query"]
+    )
+    
+    # Results built from a failed rephrase fell back to the original query
+    # alone; don't keep them, so the next run retries the rewriter
+    if not retriever.query_rewriter.has_variations(query, num_variations):
+        return results
+    
+    # Write to a temp file and rename so a partial result is never read back
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+    with open(tmp_path, "wb") as file:
+        pickle.dump(results, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, cache_path)
+    return results
+
+
+class DiskCachedEmbedder:
+    """Embedder wrapper that reuses query embeddings stored by earlier runs."""
+    
+    def __init__(self, embedder, cache):
+        self._embedder = embedder
+        self._cache = cache
+    
+    def __getattr__(self, name):
+        return getattr(self._embedder, name)
+    
+    def embed_query(self, query):
+        return self.embed_queries([query])[0]
+    
+    def embed_queries(self, queries):
+        keys = [_query_key("emb", self._embedder.model_name, self._embedder.backend, query) for query in queries]
+        with _cache_lock:
+            missing = [i for i, key in enumerate(keys) if key not in self._cache]
+        if missing:
+            encoded = self._embedder.embed_queries([queries[i] for i in missing])
+            with _cache_lock:
+                for i, embedding in zip(missing, encoded):
+                    self._cache[keys[i]] = embedding
+        with _cache_lock:
+            return np.stack([self._cache[key] for key in keys])
+
+
+class DiskCachedRewriter:
+    """QueryRewriter wrapper that reuses variations stored by earlier runs."""
+    
+    def __init__(self, rewriter, cache):
+        self._rewriter = rewriter
+        self._cache = cache
+        # Optional asyncio.Semaphore bounding concurrent LLM calls
+        self.llm_semaphore = None
+    
+    def __getattr__(self, name):
+        return getattr(self._rewriter, name)
+    
+    def has_variations(self, query, num_variations=2):
+        """Whether successfully rephrased variations are stored for the query."""
+        return self._load(_query_key("rephrase", query, num_variations)) is not None
+    
+    def rephrase(self, query, num_variations=2):
+        key = _query_key("rephrase", query, num_variations)
+        variations = self._load(key)
+        if variations is None:
+            variations = self._rewriter.rephrase(query, num_variations=num_variations)
+            self._save(key, variations)
+        return variations
+    
+    async def rephrase_async(self, query, num_variations=2):
+        key = _query_key("rephrase", query, num_variations)
+        variations = self._load(key)
+        if variations is None:
+            if self.llm_semaphore is None:
+                variations = await self._rewriter.rephrase_async(query, num_variations=num_variations)
+            else:
+                async with self.llm_semaphore:
+                    variations = await self._rewriter.rephrase_async(query, num_variations=num_variations)
+            self._save(key, variations)
+        return variations
+    
+    def _load(self, key):
+        with _cache_lock:
+            return self._cache.get(key)
+    
+    def _save(self, key, variations):
+        # A lone original query means rephrasing failed; retry on the next run
+        if len(variations) > 1:
+            with _cache_lock:
+                self._cache[key] = variations
+
+
+# UTF-8 output so chunk previews and answers print on Windows consoles
+sys.stdout.reconfigure(encoding="utf-8")
+# Setup progress is logged at INFO; run with LOGLEVEL=INFO to see it
+logging.basicConfig(level=os.getenv("LOGLEVEL", "WARNING").upper(), format="%(message)s", stream=sys.stdout)
+log = logging.getLogger("rag.test")
 
 # Load saved vector store
-print("Loading vector store...")
+log.info("Loading vector store...")
 vector_store = VectorStore(embedding_dim=384)
-vector_store.load("vector_store")
-print(f"[OK] Loaded {vector_store.get_stats()['num_vectors']} vectors")
+vector_store.load(VECTOR_STORE_PATH)
+store_hash = _store_hash(VECTOR_STORE_PATH)
+log.info("[OK] Loaded %s vectors", vector_store.get_stats()['num_vectors'])
 
 # Initialize components
-print("\nInitializing components...")
-embedder = Embedder(model_name="all-MiniLM-L6-v2")
+log.info("\nInitializing components...")
+query_cache = shelve.open(QUERY_CACHE_PATH)
+embedder = DiskCachedEmbedder(get_embedder("all-MiniLM-L6-v2", backend="onnx"), query_cache)
 
 # Initialize LLM (make sure Ollama is running and model is pulled)
-print("Initializing LLM client...")
+log.info("Initializing LLM client...")
 try:
     llm_client = LLMClient(model="llama3.2")
-    print("[OK] LLM client ready")
+    log.info("[OK] LLM client ready")
 except Exception as e:
-    print(f"[ERROR] LLM initialization failed: {e}")
-    print("Make sure Ollama is running: ollama serve")
-    print("And model is pulled: ollama pull llama3.2")
+    log.error("[ERROR] LLM initialization failed: %s", e)
+    log.error("Make sure Ollama is running: ollama serve")
+    log.error("And model is pulled: ollama pull llama3.2")
     exit(1)
 
 # Initialize query rewriter and retriever
-print("Setting up query rephrasing...")
-query_rewriter = QueryRewriter(llm_client)
-retriever = Retriever(vector_store, embedder, query_rewriter=query_rewriter)
-print("[OK] Retriever with query rephrasing ready")
+log.info("Setting up query rephrasing...")
+query_rewriter = DiskCachedRewriter(QueryRewriter(llm_client), query_cache)
+# Rephrased variations from concurrent queries share batched forward passes
+retriever = Retriever(
+    vector_store,
+    embedder,
+    query_rewriter=query_rewriter,
+    embedding_batcher=EmbeddingBatcher(embedder)
+)
+log.info("[OK] Retriever with query rephrasing ready")
 
 # Test queries - covering both PMAY and PMJAY documents
 test_queries = [
@@ -56,25 +220,67 @@ test_queries = [
     "When was PMJAY launched?"
 ]
 
-print("\n" + "=" * 60)
-print("RAG Pipeline Test: Query -> Retrieve -> Generate Answer")
-print("=" * 60)
 
-for query in test_queries:
-    print(f"\n{'='*60}")
-    print(f"Query: {query}")
-    print("-" * 60)
-    
-    # Step 1: Retrieve relevant chunks with query rephrasing
-    print("\n[Step 1] Retrieving relevant chunks (with query rephrasing)...")
-    retrieved_chunks = retriever.retrieve_with_rephrasing(
+async def run_query(query, llm_semaphore):
+    """Retrieve chunks and generate an answer for one test query."""
+    retrieved_chunks = await cached_retrieve_with_rephrasing(
+        retriever,
+        store_hash,
         query=query,
         k=3,
         min_score=0.0,
         num_variations=2,
         k_per_query=3
     )
-    print(f"Retrieved {len(retrieved_chunks)} chunks (merged from multiple query variations)")
+    
+    # Bound concurrent generations so the LLM server isn't flooded
+    async with llm_semaphore:
+        answer = await llm_client.generate_with_context_async(
+            query=query,
+            context_chunks=retrieved_chunks,
+            max_context_chunks=3
+        )
+    
+    return retrieved_chunks, answer
+
+
+async def run_queries(queries):
+    """Run all test queries concurrently, returning results (or exceptions) in query order."""
+    # Embed every original query in one forward pass up front
+    embedder.embed_queries(queries)
+    
+    # One limit for rephrasing and answer generation, the two LLM calls per query
+    llm_semaphore = asyncio.Semaphore(MAX_CONCURRENT_LLM_CALLS)
+    query_rewriter.llm_semaphore = llm_semaphore
+    try:
+        return await asyncio.gather(
+            *[run_query(query, llm_semaphore) for query in queries],
+            return_exceptions=True
+        )
+    finally:
+        await retriever.embedding_batcher.stop()
+
+
+log.info("\n" + "=" * 60)
+log.info("RAG Pipeline Test: Query -> Retrieve -> Generate Answer")
+log.info("=" * 60)
+
+log.info("\nRunning %s queries concurrently (retrieval with query rephrasing, then LLM)...", len(test_queries))
+results = asyncio.run(run_queries(test_queries))
+
+for query, result in zip(test_queries, results):
+    print(f"\n{'='*60}")
+    print(f"Query: {query}")
+    print("-" * 60)
+    
+    if isinstance(result, Exception):
+        log.error("[ERROR] Failed to answer query: %s", result)
+        continue
+    
+    retrieved_chunks, answer = result
+    
+    # Step 1: Retrieved chunks
+    print(f"\n[Step 1] Retrieved {len(retrieved_chunks)} chunks (merged from multiple query variations)")
     
     if retrieved_chunks:
         print("\nTop retrieved chunk:")
@@ -82,26 +288,17 @@ for query in test_queries:
         print(f"  Score: {top_chunk.get('similarity_score', 0):.4f}")
         print(f"  Source: {top_chunk.get('metadata', {}).get('file_name', 'Unknown')}")
         preview = top_chunk.get('content', '')[:200]
-        safe_print(f"  Preview: {preview}...")
+        print(f"  Preview: {preview}...")
     
-    # Step 2: Generate answer using LLM
-    print("\n[Step 2] Generating answer with LLM...")
-    try:
-        answer = llm_client.generate_with_context(
-            query=query,
-            context_chunks=retrieved_chunks,
-            max_context_chunks=3
-        )
-        
-        print("\nGenerated Answer:")
-        print("-" * 60)
-        safe_print(answer)
-        print("-" * 60)
-        
-    except Exception as e:
-        print(f"[ERROR] Failed to generate answer: {e}")
-
-print("\n" + "=" * 60)
-print("RAG pipeline test complete!")
-print("=" * 60)
+    # Step 2: Generated answer
+    print("\n[Step 2] Generated answer with LLM:")
+    print("-" * 60)
+    print(answer)
+    print("-" * 60)
+
+query_cache.close()
+
+log.info("\n" + "=" * 60)
+log.info("RAG pipeline test complete!")
+log.info("=" * 60)
 